@@ -5,7 +5,8 @@ import re
 import os
 import json
 import time
-from extractor import extract_text_chunks
+import heapq
+from extractor import extract_text_chunks, iter_text_chunks, get_page_count
 from utils import is_appendix_chunk, ensure_dir
 import torch
 
@@ -14,6 +15,12 @@ _ST_MODEL = None
 _SUM_PIPE = None
 _QA_PIPE = None
 
+# Large-document mode: switched on automatically above either threshold.
+# LARGE_DOC_MEMORY_MB bounds how many chunks (text + embeddings) are held at once.
+LARGE_DOC_PAGE_THRESHOLD = int(os.environ.get("LARGE_DOC_PAGE_THRESHOLD", 300))
+LARGE_DOC_BYTE_THRESHOLD = int(os.environ.get("LARGE_DOC_BYTE_THRESHOLD", 50 * 1024 * 1024))
+LARGE_DOC_MEMORY_MB = int(os.environ.get("LARGE_DOC_MEMORY_MB", 64))
+
 
 def log(msg):
     print(f"[Analyzer] {msg}", flush=True)
@@ -82,14 +89,36 @@ def load_results(uid, results_folder):
 
 
 # ========== Semantic Ranking ==========
+def is_large_document(pdf_path):
+    if os.path.getsize(pdf_path) >= LARGE_DOC_BYTE_THRESHOLD:
+        return True
+    return get_page_count(pdf_path) >= LARGE_DOC_PAGE_THRESHOLD
+
+
+def _persona_keywords(persona_text):
+    return re.findall(r"\b[a-zA-Z]{3,}\b", persona_text.lower())
+
+
+def _combined_score(chunk, s, keywords):
+    t = chunk["text"].lower()
+    boost = 0.3 * sum(1 for kw in keywords if kw in t)
+    if chunk.get("is_heading"):
+        boost += 0.5
+    return float(s) + boost
+
+
 def semantic_rank_for_file(pdf_path, persona_text, top_k=20, chunk_size=120, overlap=40, score_threshold=0.15):
+    if is_large_document(pdf_path):
+        return semantic_rank_large_file(pdf_path, persona_text, top_k=top_k, chunk_size=chunk_size,
+                                        overlap=overlap, score_threshold=score_threshold)
     start = time.time()
     log("Extracting text chunks...")
     chunks = extract_text_chunks(pdf_path, chunk_size=chunk_size, overlap=overlap)
+    # Drop empty chunks (e.g. uncaptioned images) so scores line up with chunks
+    chunks = [c for c in chunks if c["text"].strip()]
     if not chunks:
         return []
-
-    texts = [c["text"] for c in chunks if c["text"].strip()]
+    texts = [c["text"] for c in chunks]
     model = get_st_model()
 
     log("Encoding chunks (may take ~5-10s first time)...")
@@ -99,14 +128,10 @@ def semantic_rank_for_file(pdf_path, persona_text, top_k=20, chunk_size=120, ove
 
     scores = util.cos_sim(q_emb, embeddings)[0].cpu().numpy()
 
-    keywords = re.findall(r"\b[a-zA-Z]{3,}\b", persona_text.lower())
+    keywords = _persona_keywords(persona_text)
     hits = []
     for idx, (chunk, s) in enumerate(zip(chunks, scores)):
-        t = chunk["text"].lower()
-        boost = 0.3 * sum(1 for kw in keywords if kw in t)
-        if chunk.get("is_heading"): 
-            boost += 0.5
-        combined = float(s) + boost
+        combined = _combined_score(chunk, s, keywords)
         if combined >= score_threshold:
             hits.append({
                 "page": chunk.get("page"),
@@ -128,6 +153,100 @@ def semantic_rank_for_file(pdf_path, persona_text, top_k=20, chunk_size=120, ove
     return unique
 
 
+class _TopKHits:
+    """
+    Bounded min-heap of the best hits, deduplicated on the first 100 chars of
+    text the same way the in-memory ranking is. Never holds more than top_k hits.
+    """
+
+    def __init__(self, top_k):
+        self.top_k = max(1, top_k)  # in-memory ranking always keeps at least one hit
+        self._heap = []   # (score, seq, key, hit)
+        self._best = {}   # key -> score currently in the heap
+        self._seq = 0
+
+    def push(self, hit):
+        key = hit["text"][:100].lower()
+        score = hit["score"]
+        if key in self._best:
+            if self._best[key] >= score:
+                return
+            self._heap = [e for e in self._heap if e[2] != key]
+            heapq.heapify(self._heap)
+        elif len(self._heap) >= self.top_k and score <= self._heap[0][0]:
+            return
+        self._seq += 1
+        heapq.heappush(self._heap, (score, -self._seq, key, hit))
+        self._best[key] = score
+        if len(self._heap) > self.top_k:
+            _, _, old_key, _ = heapq.heappop(self._heap)
+            del self._best[old_key]
+
+    def results(self):
+        return [e[3] for e in sorted(self._heap, key=lambda e: (-e[0], -e[1]))]
+
+
+def _encode_window_size(model, chunk_size, batch_size):
+    """
+    Number of chunks to encode per window so text + embeddings stay under LARGE_DOC_MEMORY_MB.
+    """
+    dim = model.get_sentence_embedding_dimension() or 384
+    # float32 embedding + a rough allowance for the chunk dict and its text
+    per_chunk = dim * 4 + chunk_size * 16 + 512
+    return max(batch_size, (LARGE_DOC_MEMORY_MB * 1024 * 1024) // per_chunk)
+
+
+def semantic_rank_large_file(pdf_path, persona_text, top_k=20, chunk_size=120, overlap=40,
+                             score_threshold=0.15, batch_size=8):
+    """
+    Bounded-memory variant of semantic_rank_for_file for very large PDFs.
+    Chunks are streamed from the extractor and encoded in fixed-size windows;
+    each window is scored against the persona and dropped, so only one window
+    plus the top_k heap is alive at any time.
+    """
+    start = time.time()
+    model = get_st_model()
+    window_size = _encode_window_size(model, chunk_size, batch_size)
+    log(f"Large document mode: encoding in windows of {window_size} chunks...")
+
+    with torch.no_grad():
+        q_emb = model.encode(persona_text, convert_to_tensor=True)
+    keywords = _persona_keywords(persona_text)
+    top = _TopKHits(top_k)
+    total = 0
+
+    def score_window(window):
+        with torch.no_grad():
+            emb = model.encode([c["text"] for c in window], convert_to_tensor=True,
+                               batch_size=batch_size, show_progress_bar=False)
+        scores = util.cos_sim(q_emb, emb)[0].cpu().numpy()
+        for chunk, s in zip(window, scores):
+            combined = _combined_score(chunk, s, keywords)
+            if combined >= score_threshold:
+                top.push({
+                    "page": chunk.get("page"),
+                    "text": chunk["text"],
+                    "score": round(combined, 3)
+                })
+
+    window = []
+    for chunk in iter_text_chunks(pdf_path, chunk_size=chunk_size, overlap=overlap):
+        if not chunk["text"].strip():
+            continue
+        window.append(chunk)
+        if len(window) >= window_size:
+            score_window(window)
+            total += len(window)
+            window = []
+    if window:
+        score_window(window)
+        total += len(window)
+
+    unique = top.results()
+    log(f"✅ Ranking complete in {round(time.time()-start,2)}s over {total} chunks. Found {len(unique)} relevant chunks.")
+    return unique
+
+
 # ========== Summarization ==========
 def summarize_text_chunks(chunks):
     if not chunks:
@@ -1,10 +1,11 @@
 # backend/app.py
+import io
 import os
 import uuid
 import fitz  # PyMuPDF
 from datetime import datetime
 import json
-from flask import Flask, request, render_template, send_from_directory, jsonify, url_for
+from flask import Flask, request, render_template, send_from_directory, send_file, jsonify, url_for
 from werkzeug.utils import secure_filename
 from analyzer import (
     semantic_rank_for_file,
@@ -15,6 +16,7 @@ from analyzer import (
     summarize_text_chunks
 )
 from highlighter import highlight_pdf_with_ranks
+from previewer import render_page_preview, prerender_hit_pages, normalize_zoom, preview_etag, DEFAULT_ZOOM
 from utils import ensure_dir
 import re
 import textwrap
@@ -24,8 +26,10 @@ os.environ["HF_HOME"] = "B:/huggingface_cache"
 BASE_DIR = os.path.dirname(__file__)
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
 RESULTS_FOLDER = os.path.join(BASE_DIR, "static", "results")
+PREVIEW_FOLDER = os.path.join(BASE_DIR, "static", "previews")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
+os.makedirs(PREVIEW_FOLDER, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'pdf'}
 
@@ -36,6 +40,7 @@ app = Flask(
 )
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 400 * 1024 * 1024  # 400MB limit
+app.config['PREVIEW_MAX_AGE'] = 24 * 60 * 60  # page tiles only change if the PDF is re-generated
 
 
 def allowed_file(filename):
@@ -49,7 +54,9 @@ def index():
 
 @app.after_request
 def add_header(response):
-    response.headers["Cache-Control"] = "no-store"
+    # Successful page previews carry their own ETag / max-age; everything else stays uncached
+    if request.endpoint != "preview_page" or response.status_code not in (200, 304):
+        response.headers["Cache-Control"] = "no-store"
     return response
 
 
@@ -229,7 +236,10 @@ def upload():
         # Step 5: Add clean single appendix
         append_appendix_to_pdf(out_path, persona, summary, hits, uid)
 
-        # Step 6: Stats for chart
+        # Step 6: Pre-render hit pages for /preview in the background
+        prerender_hit_pages(out_path, uid, hits, PREVIEW_FOLDER)
+
+        # Step 7: Stats for chart
         color_stats = [
             sum(1 for h in hits if h["score"] >= 0.9),
             sum(1 for h in hits if 0.7 <= h["score"] < 0.9),
@@ -239,10 +249,15 @@ def upload():
         ]
 
         download_url = url_for('download_file', filename=out_name)
+        preview_urls = [
+            url_for('preview_page', uid=uid, page=p, zoom=DEFAULT_ZOOM)
+            for p in sorted({h["page"] for h in hits if h.get("page")})
+        ]
         response_data = {
             "uid": uid,
             "summary": summary,
             "download_url": download_url,
+            "preview_urls": preview_urls,
             "color_stats": color_stats,
             "hits": hits,
         }
@@ -283,5 +298,44 @@ def download_file(filename):
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename, as_attachment=True)
 
 
+@app.route('/preview/<uid>/<int:page>')
+def preview_page(uid, page):
+    """Serves one highlighted page as a PNG, e.g. /preview/ab12cd34/3?zoom=2"""
+    if not re.fullmatch(r"[0-9a-f]{8}", uid):
+        return jsonify({"error": "Invalid uid"}), 404
+
+    try:
+        results = load_results(uid, RESULTS_FOLDER)
+    except FileNotFoundError:
+        return jsonify({"error": "Unknown uid"}), 404
+    except ValueError:
+        return jsonify({"error": "Results for this uid are unreadable"}), 500
+
+    filename = secure_filename(results.get("filename", ""))
+    pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uid}_highlighted_{filename}")
+    if not os.path.exists(pdf_path):
+        return jsonify({"error": "Highlighted PDF not found"}), 404
+
+    zoom = normalize_zoom(request.args.get("zoom", DEFAULT_ZOOM))
+    try:
+        etag = preview_etag(pdf_path, page, zoom)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            png = render_page_preview(pdf_path, uid, page, zoom, PREVIEW_FOLDER)
+            response = send_file(io.BytesIO(png), mimetype="image/png", conditional=False)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    except Exception as e:
+        print(f"[PREVIEW ERROR] {e}", flush=True)
+        return jsonify({"error": f"Error rendering preview: {str(e)}"}), 500
+
+    response.set_etag(etag)
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = app.config['PREVIEW_MAX_AGE']
+    return response
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000, debug=True)
@@ -16,14 +16,35 @@ def _save_image_bytes(img_dict, out_path):
     with open(out_path, "wb") as f:
         f.write(bytes_)
 
+def get_page_count(pdf_path):
+    """
+    Page count without walking the document (used to pick the large-document mode).
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
 def extract_text_chunks(pdf_path, chunk_size=60, overlap=20):
     """
     Extract word windows as before, PLUS image blocks with caption detection.
     Returns list of chunks.
     """
+    return list(iter_text_chunks(pdf_path, chunk_size=chunk_size, overlap=overlap))
+
+def iter_text_chunks(pdf_path, chunk_size=60, overlap=20):
+    """
+    Same chunks as extract_text_chunks, yielded one at a time so large PDFs
+    never need the whole chunk list in memory.
+    """
     doc = fitz.open(pdf_path)
-    chunks = []
+    try:
+        yield from _iter_doc_chunks(doc, chunk_size, overlap)
+    finally:
+        doc.close()
 
+def _iter_doc_chunks(doc, chunk_size, overlap):
     for pindex in range(len(doc)):
         page = doc[pindex]
         # Extract structured 'blocks' so we can find image blocks and text blocks with positions
@@ -37,14 +58,14 @@ def extract_text_chunks(pdf_path, chunk_size=60, overlap=20):
             text = re.sub(r'\s+', ' ', page_text)
             words = text.split(" ")
             if len(words) <= chunk_size:
-                chunks.append({"page": pindex + 1, "text": " ".join(words), "type": "text"})
+                yield {"page": pindex + 1, "text": " ".join(words), "type": "text"}
             else:
                 start = 0
                 while start < len(words):
                     end = start + chunk_size
                     chunk_words = words[start:end]
                     chunk_text = " ".join(chunk_words)
-                    chunks.append({"page": pindex + 1, "text": chunk_text, "type": "text"})
+                    yield {"page": pindex + 1, "text": chunk_text, "type": "text"}
                     if end >= len(words):
                         break
                     start = end - overlap
@@ -112,7 +133,4 @@ def extract_text_chunks(pdf_path, chunk_size=60, overlap=20):
                     "image_path": img_path,    # may be None
                     "bbox": bbox
                 }
-                chunks.append(chunk)
-
-    doc.close()
-    return chunks
+                yield chunk
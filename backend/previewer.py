@@ -0,0 +1,148 @@
+# backend/previewer.py
+import os
+import math
+import threading
+import fitz
+from utils import ensure_dir
+
+# Zoom limits for rendered page tiles (1.0 = 72 dpi)
+DEFAULT_ZOOM = 1.5
+MIN_ZOOM = 0.5
+MAX_ZOOM = 4.0
+
+# Upper bound on rendered pixels per tile; zoom is reduced for oversized pages
+PREVIEW_MAX_PIXELS = 16 * 1000 * 1000
+
+# Disk cache ceiling; least recently used tiles are evicted past this size
+PREVIEW_CACHE_MAX_BYTES = int(os.environ.get("PREVIEW_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+
+_CACHE_LOCK = threading.Lock()
+
+
+def log(msg):
+    print(f"[Previewer] {msg}", flush=True)
+
+
+def normalize_zoom(zoom):
+    """Clamp zoom to the allowed range and round it so cache keys stay stable."""
+    try:
+        zoom = float(zoom)
+    except (TypeError, ValueError):
+        zoom = DEFAULT_ZOOM
+    if not math.isfinite(zoom):
+        zoom = DEFAULT_ZOOM
+    return round(min(max(zoom, MIN_ZOOM), MAX_ZOOM), 1)
+
+
+def _fit_zoom(fpage, zoom):
+    """Lower zoom so the rendered page stays within PREVIEW_MAX_PIXELS."""
+    area = fpage.rect.width * fpage.rect.height
+    if area <= 0:
+        return zoom
+    limit = math.sqrt(PREVIEW_MAX_PIXELS / area)
+    if zoom <= limit:
+        return zoom
+    return max(0.01, math.floor(limit * 100) / 100)
+
+
+def _load_page(doc, page):
+    if page < 1 or page > len(doc):
+        raise ValueError(f"Page {page} out of range (1-{len(doc)})")
+    return doc[page - 1]
+
+
+def preview_etag(pdf_path, page, zoom):
+    """ETag tied to the highlighted PDF on disk, so a re-generated file invalidates old tiles."""
+    st = os.stat(pdf_path)
+    return f"{int(st.st_mtime)}-{st.st_size}-p{page}-z{zoom}"
+
+
+def _tile_path(cache_dir, uid, page, zoom):
+    return os.path.join(cache_dir, f"{uid}_p{page}_z{zoom}.png")
+
+
+def _evict_lru(cache_dir, max_bytes, keep=None):
+    """
+    Delete least recently used tiles (by mtime) until the cache fits in max_bytes.
+    The tile at keep is never deleted.
+    """
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".png"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        total += st.st_size
+        if path != keep:
+            entries.append((st.st_mtime, st.st_size, path))
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def render_page_preview(pdf_path, uid, page, zoom, cache_dir):
+    """
+    Returns PNG bytes of the given 1-based page, caching rendered tiles on disk.
+    Tiles are keyed by the normalized requested zoom, so a cache hit never opens
+    the PDF; oversized pages are rendered at a lower zoom (see _fit_zoom).
+    Raises ValueError if the page is out of range.
+    """
+    ensure_dir(cache_dir)
+    zoom = normalize_zoom(zoom)
+    tile = _tile_path(cache_dir, uid, page, zoom)
+
+    with _CACHE_LOCK:
+        if os.path.exists(tile) and os.path.getmtime(tile) >= os.path.getmtime(pdf_path):
+            os.utime(tile)  # mark as recently used
+            with open(tile, "rb") as f:
+                return f.read()
+
+    doc = fitz.open(pdf_path)
+    try:
+        fpage = _load_page(doc, page)
+        render_zoom = _fit_zoom(fpage, zoom)
+        pix = fpage.get_pixmap(matrix=fitz.Matrix(render_zoom, render_zoom), alpha=False)
+        png = pix.tobytes("png")
+    finally:
+        doc.close()
+
+    with _CACHE_LOCK:
+        tmp = f"{tile}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(png)
+        os.replace(tmp, tile)
+        _evict_lru(cache_dir, PREVIEW_CACHE_MAX_BYTES, keep=tile)
+    return png
+
+
+def prerender_hit_pages(pdf_path, uid, hits, cache_dir, zoom=DEFAULT_ZOOM):
+    """
+    Renders the pages that contain hits in a background thread so the first
+    preview requests are served straight from the cache.
+    """
+    pages = sorted({h.get("page") for h in hits if h.get("page")})
+    if not pages:
+        return None
+
+    def _run():
+        for p in pages:
+            try:
+                render_page_preview(pdf_path, uid, p, zoom, cache_dir)
+            except Exception as e:
+                log(f"⚠️ Pre-render failed for {uid} page {p}: {e}")
+        log(f"✅ Pre-rendered {len(pages)} page(s) for {uid}.")
+
+    t = threading.Thread(target=_run, daemon=True)
+    t.start()
+    return t
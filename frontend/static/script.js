@@ -43,6 +43,20 @@ form.addEventListener("submit", async (e) => {
 
     document.getElementById("downloadLink").href = data.download_url;
 
+    // ===== Highlighted page previews =====
+    const hitPreviews = document.getElementById("hitPreviews");
+    if (hitPreviews) {
+      hitPreviews.innerHTML = "";
+      (data.preview_urls || []).forEach(url => {
+        const img = document.createElement("img");
+        img.src = url;
+        img.loading = "lazy";
+        img.alt = "Highlighted page preview";
+        hitPreviews.appendChild(img);
+      });
+      hitPreviews.classList.toggle("hidden", !hitPreviews.children.length);
+    }
+
     result.classList.remove("hidden");
     qaSection.classList.remove("hidden");
     progress.classList.add("hidden");